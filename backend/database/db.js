@@ -37,6 +37,147 @@ if (dbPathEnv) {
 
 const db = new Database(dbPath);
 
+// Alert types raised by pose detection, counted in alert_stats / alert_student_stats
+const POSE_ALERT_TYPES = "('suspicious', 'cheating')";
+
+// Only alerts with an integer exam_id are counted, since alert_stats.exam_id is a rowid
+// alias and would reject anything else (aborting the insert into alerts)
+const isCountedAlert = (row) => `typeof(${row}.exam_id) = 'integer' AND ${row}.type IN ${POSE_ALERT_TYPES}`;
+
+// Recompute pose alert counters from the alerts table (normally kept current by triggers)
+const rebuildAlertStats = db.transaction(() => {
+  db.exec(`
+    DELETE FROM alert_stats;
+    DELETE FROM alert_student_stats;
+
+    INSERT INTO alert_student_stats (
+      exam_id, student_id, total_alerts, high_severity, medium_severity, last_alert_id, last_alert_at
+    )
+    SELECT
+      exam_id,
+      student_id,
+      COUNT(*),
+      SUM(severity IS 'high'),
+      SUM(severity IS 'medium'),
+      MAX(id),
+      MAX(created_at)
+    FROM alerts
+    WHERE ${isCountedAlert('alerts')}
+      AND student_id IS NOT NULL
+    GROUP BY exam_id, student_id;
+
+    INSERT INTO alert_stats (
+      exam_id, total_alerts, high_severity, medium_severity, students_flagged, last_alert_id
+    )
+    SELECT
+      exam_id,
+      COUNT(*),
+      SUM(severity IS 'high'),
+      SUM(severity IS 'medium'),
+      COUNT(DISTINCT student_id),
+      MAX(id)
+    FROM alerts
+    WHERE ${isCountedAlert('alerts')}
+    GROUP BY exam_id;
+  `);
+});
+
+// Trigger bodies that add / remove one alerts row (NEW or OLD) from the pose alert
+// counters. Each statement is guarded so rows that are not counted are ignored.
+const addToAlertStats = (row) => `
+      INSERT INTO alert_stats (
+        exam_id, total_alerts, high_severity, medium_severity, students_flagged, last_alert_id, updated_at
+      )
+      SELECT
+        ${row}.exam_id,
+        1,
+        ${row}.severity IS 'high',
+        ${row}.severity IS 'medium',
+        ${row}.student_id IS NOT NULL AND NOT EXISTS (
+          SELECT 1 FROM alert_student_stats
+          WHERE exam_id = ${row}.exam_id AND student_id = ${row}.student_id
+        ),
+        ${row}.id,
+        CURRENT_TIMESTAMP
+      WHERE ${isCountedAlert(row)}
+      ON CONFLICT (exam_id) DO UPDATE SET
+        total_alerts = total_alerts + 1,
+        high_severity = high_severity + excluded.high_severity,
+        medium_severity = medium_severity + excluded.medium_severity,
+        students_flagged = students_flagged + excluded.students_flagged,
+        last_alert_id = MAX(COALESCE(last_alert_id, 0), excluded.last_alert_id),
+        updated_at = excluded.updated_at;
+
+      INSERT INTO alert_student_stats (
+        exam_id, student_id, total_alerts, high_severity, medium_severity, last_alert_id, last_alert_at
+      )
+      SELECT
+        ${row}.exam_id,
+        ${row}.student_id,
+        1,
+        ${row}.severity IS 'high',
+        ${row}.severity IS 'medium',
+        ${row}.id,
+        ${row}.created_at
+      WHERE ${isCountedAlert(row)}
+        AND ${row}.student_id IS NOT NULL
+      ON CONFLICT (exam_id, student_id) DO UPDATE SET
+        total_alerts = total_alerts + 1,
+        high_severity = high_severity + excluded.high_severity,
+        medium_severity = medium_severity + excluded.medium_severity,
+        last_alert_id = MAX(COALESCE(last_alert_id, 0), excluded.last_alert_id),
+        last_alert_at = NULLIF(MAX(COALESCE(last_alert_at, ''), COALESCE(excluded.last_alert_at, '')), '');
+`;
+
+// When the removed row held the latest id / time, they are recomputed from the remaining
+// alerts (a seek on idx_alerts_pose_exam_id); the triggers run after the row has changed.
+const removeFromAlertStats = (row) => `
+      UPDATE alert_stats SET
+        total_alerts = total_alerts - 1,
+        high_severity = high_severity - (${row}.severity IS 'high'),
+        medium_severity = medium_severity - (${row}.severity IS 'medium'),
+        students_flagged = students_flagged - (
+          ${row}.student_id IS NOT NULL AND COALESCE((
+            SELECT total_alerts FROM alert_student_stats
+            WHERE exam_id = ${row}.exam_id AND student_id = ${row}.student_id
+          ), 0) = 1
+        ),
+        last_alert_id = CASE WHEN last_alert_id = ${row}.id THEN (
+          SELECT MAX(id) FROM alerts
+          WHERE exam_id = ${row}.exam_id AND type IN ${POSE_ALERT_TYPES}
+        ) ELSE last_alert_id END,
+        updated_at = CURRENT_TIMESTAMP
+      WHERE exam_id = ${row}.exam_id AND ${isCountedAlert(row)};
+
+      UPDATE alert_student_stats SET
+        total_alerts = total_alerts - 1,
+        high_severity = high_severity - (${row}.severity IS 'high'),
+        medium_severity = medium_severity - (${row}.severity IS 'medium')
+      WHERE exam_id = ${row}.exam_id
+        AND student_id = ${row}.student_id
+        AND ${isCountedAlert(row)};
+
+      DELETE FROM alert_student_stats
+      WHERE exam_id = ${row}.exam_id AND student_id = ${row}.student_id AND total_alerts <= 0;
+
+      UPDATE alert_student_stats SET
+        last_alert_id = (
+          SELECT MAX(id) FROM alerts
+          WHERE exam_id = ${row}.exam_id AND type IN ${POSE_ALERT_TYPES} AND student_id = ${row}.student_id
+        ),
+        last_alert_at = (
+          SELECT MAX(created_at) FROM alerts
+          WHERE exam_id = ${row}.exam_id AND type IN ${POSE_ALERT_TYPES} AND student_id = ${row}.student_id
+        )
+      WHERE exam_id = ${row}.exam_id
+        AND student_id = ${row}.student_id
+        AND ${isCountedAlert(row)}
+        AND (last_alert_id = ${row}.id OR last_alert_at IS ${row}.created_at);
+`;
+
+// Bump when the counter tables or triggers change and existing counters must be rebuilt
+const ALERT_STATS_VERSION = 2;
+
 const init = () => {
   // Execute all table creation and initial data as a transaction
   db.exec(`
@@ -118,8 +259,73 @@ const init = () => {
       created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
       FOREIGN KEY (exam_id) REFERENCES exams(id) ON DELETE CASCADE
     );
+
+    -- Pose detection alerts ('suspicious' / 'cheating') per exam, newest id last.
+    -- Partial index so "alerts since X" polling is a range seek on (exam_id, id).
+    CREATE INDEX IF NOT EXISTS idx_alerts_pose_exam_id
+      ON alerts (exam_id, id)
+      WHERE type IN ${POSE_ALERT_TYPES};
+
+    -- Pre-aggregated pose alert counters, maintained by the triggers below
+    CREATE TABLE IF NOT EXISTS alert_stats (
+      exam_id INTEGER PRIMARY KEY,
+      total_alerts INTEGER NOT NULL DEFAULT 0,
+      high_severity INTEGER NOT NULL DEFAULT 0,
+      medium_severity INTEGER NOT NULL DEFAULT 0,
+      students_flagged INTEGER NOT NULL DEFAULT 0,
+      last_alert_id INTEGER,
+      updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS alert_student_stats (
+      exam_id INTEGER NOT NULL,
+      student_id TEXT NOT NULL,
+      total_alerts INTEGER NOT NULL DEFAULT 0,
+      high_severity INTEGER NOT NULL DEFAULT 0,
+      medium_severity INTEGER NOT NULL DEFAULT 0,
+      last_alert_id INTEGER,
+      last_alert_at DATETIME,
+      PRIMARY KEY (exam_id, student_id)
+    ) WITHOUT ROWID;
   `);
 
+  // Triggers are recreated on every start so existing databases pick up changes;
+  // done in one transaction so a crash can never leave a trigger dropped
+  db.transaction(() => db.exec(`
+    DROP TRIGGER IF EXISTS trg_alerts_pose_insert;
+    CREATE TRIGGER trg_alerts_pose_insert
+    AFTER INSERT ON alerts
+    WHEN ${isCountedAlert('NEW')}
+    BEGIN
+      ${addToAlertStats('NEW')}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_alerts_pose_delete;
+    CREATE TRIGGER trg_alerts_pose_delete
+    AFTER DELETE ON alerts
+    WHEN ${isCountedAlert('OLD')}
+    BEGIN
+      ${removeFromAlertStats('OLD')}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_alerts_pose_update;
+    CREATE TRIGGER trg_alerts_pose_update
+    AFTER UPDATE OF exam_id, student_id, type, severity, created_at ON alerts
+    WHEN (${isCountedAlert('OLD')}) OR (${isCountedAlert('NEW')})
+    BEGIN
+      ${removeFromAlertStats('OLD')}
+      ${addToAlertStats('NEW')}
+    END;
+  `))();
+
+  // One-off backfill of the counters for alerts stored before they existed
+  if (db.pragma('user_version', { simple: true }) < ALERT_STATS_VERSION) {
+    db.transaction(() => {
+      rebuildAlertStats();
+      db.pragma(`user_version = ${ALERT_STATS_VERSION}`);
+    })();
+  }
+
   // Insert default users
   const insertUsers = db.prepare(`
     INSERT OR IGNORE INTO users (id, username, password, role, full_name, email) 
@@ -133,4 +339,4 @@ const init = () => {
   console.log('✅ Database initialized successfully');
 };
 
-module.exports = { db, init };
+module.exports = { db, init, rebuildAlertStats, POSE_ALERT_TYPES };
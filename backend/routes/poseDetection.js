@@ -1,9 +1,24 @@
 const express = require('express');
 const router = express.Router();
-const db = require('../database/db');
+const { db, POSE_ALERT_TYPES } = require('../database/db');
 const path = require('path');
 const fs = require('fs');
 
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+// Prepared statements are cached on first use (tables only exist after db.init())
+const statements = {};
+const statement = (name, sql) => statements[name] || (statements[name] = db.prepare(sql));
+
+// Parse an optional query parameter; undefined when absent, NaN when not a non-negative integer
+const parseNonNegativeInt = (value) => {
+  if (value === undefined) {
+    return undefined;
+  }
+  return /^\d+$/.test(value) && Number.isSafeInteger(Number(value)) ? Number(value) : NaN;
+};
+
 /**
  * POST /api/pose-detection/alert
  * Receive alert from Python pose detection server
@@ -21,35 +36,32 @@ router.post('/alert', (req, res) => {
 
     console.log(`🚨 Pose Detection Alert: ${student_id} - ${suspicion_level}`, suspicious_activities);
 
-    // Store alert in database (using alerts table)
-    const insertAlert = db.prepare(`
-      INSERT INTO alerts (
-        exam_id, 
-        roll_number, 
-        alert_type, 
-        severity, 
-        description, 
-        timestamp,
-        image_path,
-        status
-      ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    `);
-
+    // Store alert in database (using alerts table); counters are updated by triggers.
+    // The timestamp is normalised to CURRENT_TIMESTAMP's format so created_at sorts correctly.
     const alert_type = suspicion_level === 'Hot_Suspect' ? 'cheating' : 'suspicious';
     const severity = suspicion_level === 'Hot_Suspect' ? 'high' : 'medium';
     const description = Array.isArray(suspicious_activities) 
       ? suspicious_activities.join(', ') 
       : suspicious_activities;
 
-    const result = insertAlert.run(
+    const result = statement('insertAlert', `
+      INSERT INTO alerts (
+        exam_id, 
+        student_id, 
+        type, 
+        severity, 
+        description, 
+        snapshot_url,
+        created_at
+      ) VALUES (?, ?, ?, ?, ?, ?, COALESCE(datetime(?), CURRENT_TIMESTAMP))
+    `).run(
       exam_id || null,
       student_id,
       alert_type,
       severity,
       description,
-      timestamp || new Date().toISOString(),
       snapshot_path || null,
-      'pending'
+      timestamp || null
     );
 
     res.json({
@@ -69,20 +81,76 @@ router.post('/alert', (req, res) => {
 
 /**
  * GET /api/pose-detection/alerts/:examId
- * Get all pose detection alerts for an exam
+ * Get pose detection alerts for an exam, cursor-paginated by alert id.
+ *   ?since_id=N   alerts newer than N, oldest first (for polling)
+ *   ?before_id=N  alerts older than N, newest first (for paging back)
+ *   ?limit=N      page size (default 50, max 200)
+ * Without a cursor the newest page is returned.
  */
 router.get('/alerts/:examId', (req, res) => {
   try {
     const { examId } = req.params;
-    
-    const alerts = db.prepare(`
-      SELECT * FROM alerts 
-      WHERE exam_id = ? 
-      AND alert_type IN ('suspicious', 'cheating')
-      ORDER BY timestamp DESC
-    `).all(examId);
+    const { since_id, before_id } = req.query;
+
+    if (since_id !== undefined && before_id !== undefined) {
+      return res.status(400).json({ error: 'Use either since_id or before_id, not both' });
+    }
 
-    res.json(alerts);
+    const sinceId = parseNonNegativeInt(since_id);
+    const beforeId = parseNonNegativeInt(before_id);
+    const limit = parseNonNegativeInt(req.query.limit);
+
+    if (Number.isNaN(sinceId) || Number.isNaN(beforeId)) {
+      return res.status(400).json({ error: 'since_id and before_id must be non-negative integers' });
+    }
+    if (Number.isNaN(limit) || limit === 0) {
+      return res.status(400).json({ error: 'limit must be a positive integer' });
+    }
+    const pageSize = Math.min(limit ?? DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE);
+
+    // Fetch one extra row to know whether another page exists
+    let alerts;
+    if (sinceId !== undefined) {
+      alerts = statement('alertsSince', `
+        SELECT * FROM alerts
+        WHERE exam_id = ?
+        AND type IN ${POSE_ALERT_TYPES}
+        AND id > ?
+        ORDER BY id ASC
+        LIMIT ?
+      `).all(examId, sinceId, pageSize + 1);
+    } else {
+      alerts = statement('alertsBefore', `
+        SELECT * FROM alerts
+        WHERE exam_id = ?
+        AND type IN ${POSE_ALERT_TYPES}
+        AND id < ?
+        ORDER BY id DESC
+        LIMIT ?
+      `).all(examId, beforeId ?? Number.MAX_SAFE_INTEGER, pageSize + 1);
+    }
+
+    const has_more = alerts.length > pageSize;
+    if (has_more) {
+      alerts.pop();
+    }
+
+    // Newest id seen so far; only meaningful for polling and the newest page
+    let next_since_id = null;
+    if (sinceId !== undefined) {
+      next_since_id = alerts.length ? alerts[alerts.length - 1].id : sinceId;
+    } else if (beforeId === undefined) {
+      next_since_id = alerts.length ? alerts[0].id : 0;
+    }
+
+    res.json({
+      alerts,
+      has_more,
+      // Pass back as since_id to poll for newer alerts
+      next_since_id,
+      // Pass back as before_id to page further into history
+      next_before_id: sinceId === undefined && has_more ? alerts[alerts.length - 1].id : null
+    });
   } catch (error) {
     console.error('Error fetching pose detection alerts:', error);
     res.status(500).json({ error: error.message });
@@ -91,30 +159,53 @@ router.get('/alerts/:examId', (req, res) => {
 
 /**
  * GET /api/pose-detection/stats/:examId
- * Get pose detection statistics for an exam
+ * Get pose detection statistics for an exam (pre-aggregated counters)
  */
 router.get('/stats/:examId', (req, res) => {
   try {
     const { examId } = req.params;
     
-    const stats = db.prepare(`
-      SELECT 
-        COUNT(*) as total_alerts,
-        SUM(CASE WHEN severity = 'high' THEN 1 ELSE 0 END) as high_severity,
-        SUM(CASE WHEN severity = 'medium' THEN 1 ELSE 0 END) as medium_severity,
-        COUNT(DISTINCT roll_number) as students_flagged
-      FROM alerts
-      WHERE exam_id = ? 
-      AND alert_type IN ('suspicious', 'cheating')
+    const stats = statement('examStats', `
+      SELECT total_alerts, high_severity, medium_severity, students_flagged, last_alert_id
+      FROM alert_stats
+      WHERE exam_id = ?
     `).get(examId);
 
-    res.json(stats);
+    res.json(stats || {
+      total_alerts: 0,
+      high_severity: 0,
+      medium_severity: 0,
+      students_flagged: 0,
+      last_alert_id: null
+    });
   } catch (error) {
     console.error('Error fetching pose detection stats:', error);
     res.status(500).json({ error: error.message });
   }
 });
 
+/**
+ * GET /api/pose-detection/stats/:examId/students
+ * Get per-student pose detection counters for an exam, most flagged first
+ */
+router.get('/stats/:examId/students', (req, res) => {
+  try {
+    const { examId } = req.params;
+
+    const students = statement('studentStats', `
+      SELECT student_id, total_alerts, high_severity, medium_severity, last_alert_id, last_alert_at
+      FROM alert_student_stats
+      WHERE exam_id = ?
+      ORDER BY total_alerts DESC, student_id ASC
+    `).all(examId);
+
+    res.json(students);
+  } catch (error) {
+    console.error('Error fetching pose detection student stats:', error);
+    res.status(500).json({ error: error.message });
+  }
+});
+
 /**
  * GET /api/pose-detection/snapshot/:filename
  * Serve snapshot image